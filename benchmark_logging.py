@@ -0,0 +1,102 @@
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import database
+from logging_config import setup_logging, stop_logging
+
+class SlowStream:
+    """Поток вывода с задержкой записи, как у перегруженного stderr или журнального агента"""
+
+    def __init__(self, stream, delay: float = 0.001):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data: str):
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+def configure_sync(stream):
+    """Прежняя схема: синхронный StreamHandler, как у logging.basicConfig"""
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+def measure(client, iterations: int) -> list:
+    """Задержки цикла создание/обновление/удаление записи, в миллисекундах"""
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        item_id = client.post("/items", json={"name": f"Замер {i}", "price": 1.0}).json()["id"]
+        client.put(f"/items/{item_id}", json={"quantity": i})
+        client.delete(f"/items/{item_id}")
+        latencies.append((time.perf_counter() - started) * 1000 / 3)
+    return latencies
+
+def run_benchmark(iterations: int = 1000):
+    """Сравнение задержки запросов при разных настройках журналирования"""
+    workdir = tempfile.mkdtemp()
+    database.DATABASE_NAME = os.path.join(workdir, "benchmark.db")
+    database.init_db()
+
+    from fastapi.testclient import TestClient
+    from main import app
+    client = TestClient(app)
+    # Журнал клиента httpx к замеру сервера не относится
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    log_stream = open(os.path.join(workdir, "benchmark.log"), "w", encoding="utf-8")
+    slow_stream = SlowStream(log_stream)
+    configurations = {
+        "Журнал отключен": lambda: logging.disable(logging.CRITICAL),
+        "Синхронный StreamHandler": lambda: configure_sync(log_stream),
+        "Очередь + JSON, без прореживания": lambda: setup_logging(
+            stream=log_stream, sample_rates={logging.INFO: 1.0}, force=True
+        ),
+        "Очередь + JSON, прореживание 10%": lambda: setup_logging(stream=log_stream, force=True),
+        "Медленный вывод, синхронно": lambda: configure_sync(slow_stream),
+        "Медленный вывод, очередь": lambda: setup_logging(
+            stream=slow_stream, sample_rates={logging.INFO: 1.0}, force=True
+        )
+    }
+
+    def report(name: str, latencies: list):
+        latencies = sorted(latencies)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{name:<36}{statistics.mean(latencies):>10.3f}{statistics.median(latencies):>10.3f}{p99:>10.3f}")
+
+    logging.disable(logging.CRITICAL)
+    measure(client, 200)  # Прогрев
+    print(f"Итераций: {iterations}, задержка одного запроса в мс")
+    print(f"{'Конфигурация':<36}{'среднее':>10}{'p50':>10}{'p99':>10}")
+
+    # Остальные конфигурации включают middleware приложения (идентификатор
+    # запроса, учёт нагрузки), поэтому их стоимость замеряется отдельно
+    user_middleware = app.user_middleware
+    app.user_middleware, app.middleware_stack = [], None
+    report("Журнал и middleware отключены", measure(client, iterations))
+    app.user_middleware, app.middleware_stack = user_middleware, None
+
+    for name, configure in configurations.items():
+        logging.disable(logging.NOTSET)
+        configure()
+        report(name, measure(client, iterations))
+
+    logging.disable(logging.NOTSET)
+    stop_logging()
+    setup_logging(stream=sys.stderr, force=True)
+    log_stream.close()
+
+if __name__ == "__main__":
+    run_benchmark()
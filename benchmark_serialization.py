@@ -0,0 +1,75 @@
+import json
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from models import Item
+from negotiation import CODECS, MSGPACK_MEDIA_TYPE, CBOR_MEDIA_TYPE
+
+# Названия и описания, похожие на реальные данные справочника
+NAMES = ["Ноутбук", "Мышь", "Клавиатура", "Монитор", "Принтер", "Сканер", "Наушники", "Колонки"]
+DESCRIPTIONS = [
+    "Игровой ноутбук с дискретной видеокартой",
+    "Беспроводная игровая мышь",
+    "Механическая клавиатура с подсветкой",
+    "27-дюймовый 4K монитор",
+    "Лазерный принтер для офиса",
+    None
+]
+
+def build_dataset(count: int = 1000) -> list:
+    """Формирование списка записей в том виде, в каком его отдаёт GET /items"""
+    random.seed(42)
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    items = []
+    for item_id in range(1, count + 1):
+        item = Item(
+            id=item_id,
+            name=f"{random.choice(NAMES)} {item_id}",
+            description=random.choice(DESCRIPTIONS),
+            price=round(random.uniform(10, 2000), 2),
+            quantity=random.randint(0, 100),
+            created_at=created_at + timedelta(minutes=item_id),
+            updated_at=created_at + timedelta(minutes=item_id, seconds=30)
+        )
+        items.append(item.model_dump(mode="json"))
+    return items
+
+def run_benchmark(count: int = 1000, repeat: int = 50):
+    """Сравнение размера и скорости кодирования/декодирования форматов"""
+    items = build_dataset(count)
+    formats = {
+        "JSON (ensure_ascii=True)": (
+            lambda data: json.dumps(data).encode("utf-8"),
+            json.loads
+        ),
+        "JSON (ensure_ascii=False)": (
+            lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            json.loads
+        )
+    }
+    if MSGPACK_MEDIA_TYPE in CODECS:
+        formats["MessagePack"] = CODECS[MSGPACK_MEDIA_TYPE]
+    if CBOR_MEDIA_TYPE in CODECS:
+        formats["CBOR"] = CODECS[CBOR_MEDIA_TYPE]
+
+    print(f"Набор данных: {count} записей, {repeat} повторов")
+    print(f"{'Формат':<28}{'Размер, байт':>14}{'Кодирование, мс':>18}{'Декодирование, мс':>20}")
+
+    baseline_size = None
+    for name, (encode, decode) in formats.items():
+        payload = encode(items)
+        assert decode(payload) == items
+        encode_ms = timeit.timeit(lambda: encode(items), number=repeat) / repeat * 1000
+        decode_ms = timeit.timeit(lambda: decode(payload), number=repeat) / repeat * 1000
+        baseline_size = baseline_size or len(payload)
+        ratio = len(payload) / baseline_size * 100
+        print(f"{name:<28}{len(payload):>8} ({ratio:3.0f}%){encode_ms:>18.2f}{decode_ms:>20.2f}")
+
+    missing = {"MessagePack": "msgpack", "CBOR": "cbor2"}
+    for name, package in missing.items():
+        if name not in formats:
+            print(f"{name}: не установлен пакет {package}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,11 +1,13 @@
 import sqlite3
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 DATABASE_NAME = "integration.db"
+# Сколько init_db ждёт блокировку, занятую другими соединениями
+INIT_BUSY_TIMEOUT_MS = 5000
 
 @contextmanager
 def get_db_connection():
@@ -21,6 +23,26 @@ def init_db():
     """Инициализация базы данных и создание таблиц"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {INIT_BUSY_TIMEOUT_MS}")
+        
+        # Включаем инкрементальную очистку, чтобы освобождать место после удалений.
+        # Для уже существующей базы режим вступает в силу только после VACUUM,
+        # которому нужна монопольная блокировка. Если базу держит другое
+        # соединение, переход откладывается до следующего запуска.
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:
+            try:
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cursor.execute("VACUUM")
+                logger.info("Включен режим auto_vacuum = INCREMENTAL")
+            except sqlite3.OperationalError as e:
+                logger.warning("Не удалось включить auto_vacuum = INCREMENTAL: %s", e)
+        
+        # WAL позволяет читать во время записи и выполнять контрольные точки в фоне
+        try:
+            cursor.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError as e:
+            logger.warning("Не удалось включить режим WAL: %s", e)
         
         # Создание таблицы items
         cursor.execute('''
@@ -49,6 +71,68 @@ def init_db():
         conn.commit()
         logger.info("Таблица items создана или уже существует")
 
+MAX_SQL_VARIABLES = 500  # Безопасный размер пачки параметров для IN (...)
+
+class BatchOperationError(Exception):
+    """Ошибка выполнения операции в пакетном запросе"""
+    def __init__(self, index: int, item_id: Optional[int], message: str):
+        super().__init__(message)
+        self.index = index
+        self.item_id = item_id
+
+def _select_item(cursor, item_id: int) -> Optional[Dict[str, Any]]:
+    """Получение записи по ID в рамках открытого соединения"""
+    cursor.execute("SELECT * FROM items WHERE id = ?", (item_id,))
+    item = cursor.fetchone()
+    return dict(item) if item else None
+
+def _insert_item(cursor, item_data) -> int:
+    """Вставка новой записи в рамках открытого соединения"""
+    cursor.execute('''
+        INSERT INTO items (name, description, price, quantity)
+        VALUES (?, ?, ?, ?)
+    ''', (
+        item_data.name,
+        item_data.description,
+        item_data.price,
+        item_data.quantity
+    ))
+    return cursor.lastrowid
+
+def _update_item(cursor, item_id: int, item_data) -> None:
+    """Обновление записи в рамках открытого соединения"""
+    # Формируем SQL запрос динамически на основе переданных полей
+    updates = []
+    values = []
+    
+    if item_data.name is not None:
+        updates.append("name = ?")
+        values.append(item_data.name)
+    
+    if item_data.description is not None:
+        updates.append("description = ?")
+        values.append(item_data.description)
+    
+    if item_data.price is not None:
+        updates.append("price = ?")
+        values.append(item_data.price)
+    
+    if item_data.quantity is not None:
+        updates.append("quantity = ?")
+        values.append(item_data.quantity)
+    
+    if not updates:
+        return
+    
+    values.append(item_id)
+    sql = f"UPDATE items SET {', '.join(updates)} WHERE id = ?"
+    cursor.execute(sql, values)
+
+def _delete_item(cursor, item_id: int) -> bool:
+    """Удаление записи в рамках открытого соединения"""
+    cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
+    return cursor.rowcount > 0
+
 def get_all_items() -> List[Dict[str, Any]]:
     """Получение всех записей из таблицы items"""
     with get_db_connection() as conn:
@@ -59,71 +143,91 @@ def get_all_items() -> List[Dict[str, Any]]:
 
 def get_item_by_id(item_id: int) -> Optional[Dict[str, Any]]:
     """Получение записи по ID"""
+    with get_db_connection() as conn:
+        return _select_item(conn.cursor(), item_id)
+
+def get_items_by_ids(item_ids: List[int]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Получение нескольких записей одним запросом IN (...)
+    
+    Возвращает найденные записи в порядке запрошенных ID и список
+    отсутствующих ID. Повторяющиеся ID учитываются один раз.
+    """
+    unique_ids = list(dict.fromkeys(item_ids))
+    found = {}
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM items WHERE id = ?", (item_id,))
-        item = cursor.fetchone()
-        return dict(item) if item else None
+        for start in range(0, len(unique_ids), MAX_SQL_VARIABLES):
+            chunk = unique_ids[start:start + MAX_SQL_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT * FROM items WHERE id IN ({placeholders})", chunk)
+            for row in cursor.fetchall():
+                found[row["id"]] = dict(row)
+    
+    items = [found[item_id] for item_id in unique_ids if item_id in found]
+    missing = [item_id for item_id in unique_ids if item_id not in found]
+    return items, missing
 
 def create_item(item_data: dict) -> Dict[str, Any]:
     """Создание новой записи"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO items (name, description, price, quantity)
-            VALUES (?, ?, ?, ?)
-        ''', (
-            item_data.name,
-            item_data.description,
-            item_data.price,
-            item_data.quantity
-        ))
+        item_id = _insert_item(cursor, item_data)
         conn.commit()
         
         # Получаем созданную запись
-        item_id = cursor.lastrowid
-        return get_item_by_id(item_id)
+        return _select_item(cursor, item_id)
 
 def update_item(item_id: int, item_data: dict) -> Optional[Dict[str, Any]]:
     """Обновление существующей записи"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        
-        # Формируем SQL запрос динамически на основе переданных полей
-        updates = []
-        values = []
-        
-        if item_data.name is not None:
-            updates.append("name = ?")
-            values.append(item_data.name)
-        
-        if item_data.description is not None:
-            updates.append("description = ?")
-            values.append(item_data.description)
-        
-        if item_data.price is not None:
-            updates.append("price = ?")
-            values.append(item_data.price)
-        
-        if item_data.quantity is not None:
-            updates.append("quantity = ?")
-            values.append(item_data.quantity)
-        
-        if not updates:
-            return get_item_by_id(item_id)
-        
-        values.append(item_id)
-        sql = f"UPDATE items SET {', '.join(updates)} WHERE id = ?"
-        
-        cursor.execute(sql, values)
+        _update_item(cursor, item_id, item_data)
         conn.commit()
         
-        return get_item_by_id(item_id)
+        return _select_item(cursor, item_id)
 
 def delete_item(item_id: int) -> bool:
     """Удаление записи"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
+        deleted = _delete_item(cursor, item_id)
         conn.commit()
-        return cursor.rowcount > 0
\ No newline at end of file
+        return deleted
+
+def execute_batch(operations: List[Tuple[str, Optional[int], Any]]) -> List[Dict[str, Any]]:
+    """Выполнение списка операций в одной транзакции
+    
+    Каждая операция задаётся кортежем (op, item_id, data), где op —
+    "get", "create", "update" или "delete". Если хотя бы одна операция
+    обращается к несуществующей записи, транзакция откатывается и
+    выбрасывается BatchOperationError.
+    """
+    results = []
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # sqlite3 открывает транзакцию неявно только перед изменением данных,
+        # поэтому начинаем её явно: чтения и проверки тоже должны в неё входить
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for index, (op, item_id, data) in enumerate(operations):
+                if op == "create":
+                    item_id = _insert_item(cursor, data)
+                elif op in ("get", "update", "delete"):
+                    if _select_item(cursor, item_id) is None:
+                        raise BatchOperationError(
+                            index, item_id, f"Запись с ID {item_id} не найдена"
+                        )
+                    if op == "update":
+                        _update_item(cursor, item_id, data)
+                    elif op == "delete":
+                        _delete_item(cursor, item_id)
+                else:
+                    raise BatchOperationError(index, item_id, f"Неизвестная операция: {op}")
+                
+                item = None if op == "delete" else _select_item(cursor, item_id)
+                results.append({"op": op, "id": item_id, "item": item})
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return results
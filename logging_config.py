@@ -0,0 +1,153 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO
+
+# Идентификатор текущего запроса для связи записей журнала между собой
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Доля сохраняемых записей с extra={"sampled": True} для каждого уровня.
+# Ошибки и предупреждения не прореживаются.
+DEFAULT_SAMPLE_RATES = {
+    logging.DEBUG: 0.01,
+    logging.INFO: 0.1
+}
+
+# Стандартные атрибуты LogRecord, которые не относятся к полям extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет к записи идентификатор текущего запроса"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class RequestIdMiddleware:
+    """ASGI-middleware идентификатора запроса
+
+    Берёт идентификатор из заголовка X-Request-ID или создаёт новый,
+    делает его доступным журналу и возвращает клиенту в ответе.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+        header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+class SamplingFilter(logging.Filter):
+    """Прореживание массовых записей об успешных операциях по уровням"""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return random.random() < self.rates.get(record.levelno, 1.0)
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись в потоке запроса
+
+    Сообщение собирается из msg и args уже в потоке QueueListener,
+    поэтому в аргументах журнала передаются только неизменяемые значения.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записи журнала в одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-")
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry and key != "sampled":
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logging(
+    level: int = logging.INFO,
+    stream: Optional[TextIO] = None,
+    sample_rates: Optional[Dict[int, float]] = None,
+    force: bool = False
+) -> Optional[logging.handlers.QueueListener]:
+    """Настройка неблокирующего структурированного журналирования
+
+    Записи попадают в очередь, а запись в поток вывода выполняет
+    QueueListener в отдельном потоке. Как и logging.basicConfig, ничего
+    не меняет, если у корневого журнала уже есть обработчики (например,
+    задан uvicorn --log-config); force=True заменяет их.
+
+    Журнал uvicorn.access не передаёт записи корневому журналу, поэтому
+    строки доступа uvicorn остаются синхронными и без request_id.
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return None
+    stop_logging()
+
+    output_handler = logging.StreamHandler(stream)
+    output_handler.setFormatter(JsonFormatter())
+
+    queue_handler = LazyQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(DEFAULT_SAMPLE_RATES if sample_rates is None else sample_rates))
+    queue_handler.addFilter(RequestIdFilter())
+
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, output_handler)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Остановка фонового потока с дозаписью оставшихся записей"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
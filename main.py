@@ -1,11 +1,20 @@
 from fastapi import FastAPI, HTTPException, status
 from fastapi.responses import JSONResponse
-from database import init_db, get_all_items, get_item_by_id, create_item, update_item, delete_item
-from models import Item, ItemCreate, ItemUpdate
+from database import (
+    init_db, get_all_items, get_item_by_id, get_items_by_ids, create_item, update_item,
+    delete_item, execute_batch, BatchOperationError
+)
+from maintenance import maintenance_scheduler, LoadTrackingMiddleware
+from negotiation import NegotiatedRoute
+from models import (
+    Item, ItemCreate, ItemUpdate, BatchGetRequest, BatchGetResponse, BatchRequest, BatchResponse
+)
+from logging_config import setup_logging, RequestIdMiddleware
 import logging
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+# Настройка логирования: JSON-записи пишутся в отдельном потоке,
+# если журнал не настроен заранее (например, через uvicorn --log-config)
+setup_logging(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -13,12 +22,25 @@ app = FastAPI(
     description="API для обмена данными между компонентами информационной системы",
     version="1.0.0"
 )
+# Согласование формата: JSON, MessagePack (application/msgpack) или CBOR (application/cbor)
+app.router.route_class = NegotiatedRoute
 
 # Инициализация базы данных при запуске
 @app.on_event("startup")
 def startup_event():
     init_db()
     logger.info("База данных инициализирована")
+    maintenance_scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    maintenance_scheduler.stop()
+
+# Учёт активных запросов, чтобы обслуживание базы не мешало их обработке
+app.add_middleware(LoadTrackingMiddleware, scheduler=maintenance_scheduler)
+
+# Идентификатор запроса для связи записей журнала (берётся из X-Request-ID или создаётся)
+app.add_middleware(RequestIdMiddleware)
 
 # Корневой endpoint
 @app.get("/")
@@ -31,7 +53,9 @@ def read_root():
             "GET /items/{id}": "Получить запись по ID",
             "POST /items": "Создать новую запись",
             "PUT /items/{id}": "Обновить запись",
-            "DELETE /items/{id}": "Удалить запись"
+            "DELETE /items/{id}": "Удалить запись",
+            "POST /items/batch-get": "Получить несколько записей по списку ID",
+            "POST /batch": "Выполнить несколько операций в одной транзакции"
         }
     }
 
@@ -43,7 +67,21 @@ def read_items():
         items = get_all_items()
         return items
     except Exception as e:
-        logger.error(f"Ошибка при получении записей: {e}")
+        logger.error("Ошибка при получении записей: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера"
+        )
+
+# Получение нескольких записей по списку ID
+@app.post("/items/batch-get", response_model=BatchGetResponse, status_code=status.HTTP_200_OK)
+def read_items_batch(request: BatchGetRequest):
+    """Получение нескольких записей одним запросом к базе данных"""
+    try:
+        items, missing = get_items_by_ids(request.ids)
+        return {"items": items, "missing": missing}
+    except Exception as e:
+        logger.error("Ошибка при получении записей %s: %s", request.ids, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера"
@@ -64,7 +102,7 @@ def read_item(item_id: int):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Ошибка при получении записи {item_id}: {e}")
+        logger.error("Ошибка при получении записи %s: %s", item_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера"
@@ -76,10 +114,10 @@ def create_new_item(item: ItemCreate):
     """Создание новой записи в базе данных"""
     try:
         new_item = create_item(item)
-        logger.info(f"Создана новая запись с ID: {new_item['id']}")
+        logger.info("Создана новая запись с ID: %s", new_item["id"], extra={"sampled": True})
         return new_item
     except Exception as e:
-        logger.error(f"Ошибка при создании записи: {e}")
+        logger.error("Ошибка при создании записи: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка при создании записи"
@@ -99,12 +137,12 @@ def update_existing_item(item_id: int, item_update: ItemUpdate):
             )
         
         updated_item = update_item(item_id, item_update)
-        logger.info(f"Обновлена запись с ID: {item_id}")
+        logger.info("Обновлена запись с ID: %s", item_id, extra={"sampled": True})
         return updated_item
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Ошибка при обновлении записи {item_id}: {e}")
+        logger.error("Ошибка при обновлении записи %s: %s", item_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка при обновлении записи"
@@ -124,17 +162,43 @@ def delete_existing_item(item_id: int):
             )
         
         delete_item(item_id)
-        logger.info(f"Удалена запись с ID: {item_id}")
+        logger.info("Удалена запись с ID: %s", item_id, extra={"sampled": True})
         return {"message": f"Запись с ID {item_id} успешно удалена"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Ошибка при удалении записи {item_id}: {e}")
+        logger.error("Ошибка при удалении записи %s: %s", item_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка при удалении записи"
         )
 
+# Пакетное выполнение операций
+@app.post("/batch", response_model=BatchResponse, status_code=status.HTTP_200_OK)
+def run_batch(request: BatchRequest):
+    """Выполнение нескольких операций в одной транзакции"""
+    operations = [
+        (operation.op, getattr(operation, "id", None), getattr(operation, "data", None))
+        for operation in request.operations
+    ]
+    
+    try:
+        results = execute_batch(operations)
+        logger.info("Выполнен пакет из %s операций", len(results), extra={"sampled": True})
+        return {"results": results}
+    except BatchOperationError as e:
+        # 409, а не 404: обработчик 404 ниже подменяет detail на «Маршрут не найден»
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"operation": e.index, "id": e.item_id, "msg": str(e)}
+        )
+    except Exception as e:
+        logger.error("Ошибка при выполнении пакета операций: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ошибка при выполнении пакета операций"
+        )
+
 # Endpoint для проверки здоровья
 @app.get("/health")
 def health_check():
@@ -142,7 +206,8 @@ def health_check():
     return {
         "status": "healthy",
         "service": "integration-api",
-        "timestamp": "2024-01-01T00:00:00Z"  # В реальном приложении используйте datetime.now()
+        "timestamp": "2024-01-01T00:00:00Z",  # В реальном приложении используйте datetime.now()
+        "maintenance": maintenance_scheduler.get_stats()
     }
 
 # Обработка несуществующих маршрутов
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+def _env_number(name: str, default: float) -> float:
+    """Чтение положительного числового параметра обслуживания из переменной окружения"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = type(default)(value)
+    except ValueError:
+        number = None
+    # Ноль и отрицательные значения недопустимы: incremental_vacuum(0)
+    # освобождает весь список страниц за одну транзакцию
+    if number is None or number <= 0:
+        logger.warning("Некорректное значение %s=%r, используется %s", name, value, default)
+        return default
+    return number
+
+# Интервалы запуска задач обслуживания, в секундах
+CHECKPOINT_INTERVAL = _env_number("DB_MAINTENANCE_CHECKPOINT_INTERVAL", 5 * 60.0)
+VACUUM_INTERVAL = _env_number("DB_MAINTENANCE_VACUUM_INTERVAL", 60 * 60.0)
+OPTIMIZE_INTERVAL = _env_number("DB_MAINTENANCE_OPTIMIZE_INTERVAL", 6 * 60 * 60.0)
+
+# Задачи запускаются только после такого периода без запросов
+IDLE_SECONDS = _env_number("DB_MAINTENANCE_IDLE_SECONDS", 2.0)
+# Сколько страниц освобождать за один шаг incremental_vacuum
+VACUUM_STEP_PAGES = _env_number("DB_MAINTENANCE_VACUUM_STEP_PAGES", 256)
+# Предельное число шагов incremental_vacuum за один запуск
+VACUUM_MAX_STEPS = _env_number("DB_MAINTENANCE_VACUUM_MAX_STEPS", 100)
+# Сколько соединение обслуживания ждёт блокировку, прежде чем отступить
+BUSY_TIMEOUT_MS = _env_number("DB_MAINTENANCE_BUSY_TIMEOUT_MS", 100)
+
+class MaintenanceScheduler:
+    """Фоновый планировщик обслуживания базы данных
+
+    Выполняет контрольные точки WAL, incremental_vacuum и PRAGMA optimize
+    в отдельном потоке, когда приложение не обрабатывает запросы.
+    """
+
+    def __init__(
+        self,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+        vacuum_interval: float = VACUUM_INTERVAL,
+        optimize_interval: float = OPTIMIZE_INTERVAL,
+        idle_seconds: float = IDLE_SECONDS
+    ):
+        self.intervals = {
+            "checkpoint": checkpoint_interval,
+            "vacuum": vacuum_interval,
+            "optimize": optimize_interval
+        }
+        self.idle_seconds = idle_seconds
+        self.tasks: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+            "checkpoint": self._checkpoint,
+            "vacuum": self._incremental_vacuum,
+            "optimize": self._optimize
+        }
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._next_run = {name: time.monotonic() + interval for name, interval in self.intervals.items()}
+        self._active_requests = 0
+        self._last_request = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Учёт нагрузки
+    def request_started(self):
+        with self._lock:
+            self._active_requests += 1
+
+    def request_finished(self):
+        with self._lock:
+            self._active_requests -= 1
+            self._last_request = time.monotonic()
+
+    def is_idle(self) -> bool:
+        """Проверка, что запросов нет и не было в течение idle_seconds"""
+        with self._lock:
+            return (
+                self._active_requests == 0
+                and time.monotonic() - self._last_request >= self.idle_seconds
+            )
+
+    # Управление потоком
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+        logger.info("Планировщик обслуживания базы данных запущен")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Планировщик обслуживания базы данных остановлен")
+
+    def _run(self):
+        while not self._stop_event.wait(1.0):
+            now = time.monotonic()
+            for name in self.tasks:
+                if self._stop_event.is_set() or not self.is_idle():
+                    break
+                if now >= self._next_run[name]:
+                    self.run_task(name)
+                    self._next_run[name] = time.monotonic() + self.intervals[name]
+
+    def run_task(self, name: str) -> Dict[str, Any]:
+        """Немедленное выполнение задачи обслуживания с записью статистики"""
+        started = time.perf_counter()
+        entry: Dict[str, Any] = {"last_run": datetime.now(timezone.utc).isoformat()}
+        try:
+            with get_db_connection() as conn:
+                conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+                entry.update(self.tasks[name](conn))
+            entry["status"] = "ok"
+        except Exception as e:
+            logger.warning("Задача обслуживания %s не выполнена: %s", name, e)
+            entry["status"] = "error"
+            entry["error"] = str(e)
+        entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        entry["runs"] = self.stats.get(name, {}).get("runs", 0) + 1
+        self.stats[name] = entry
+        return entry
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика последних запусков для health check"""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "tasks": dict(self.stats)
+        }
+
+    # Задачи обслуживания
+    def _checkpoint(self, conn) -> Dict[str, Any]:
+        # PASSIVE не ждёт читателей и писателей, переносит только то, что может
+        busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return {"busy": bool(busy), "log_frames": log_frames, "checkpointed_frames": checkpointed}
+
+    def _incremental_vacuum(self, conn) -> Dict[str, Any]:
+        # Без auto_vacuum = INCREMENTAL прагма ничего не делает
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:
+            raise RuntimeError(f"incremental_vacuum недоступен: auto_vacuum = {auto_vacuum}")
+
+        # Освобождаем страницы небольшими шагами и уступаем, как только пришёл запрос
+        initial = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        free_pages = initial
+        steps = 0
+        while free_pages > 0 and steps < VACUUM_MAX_STEPS:
+            if self._stop_event.is_set() or not self.is_idle():
+                break
+            conn.execute(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})").fetchall()
+            conn.commit()
+            steps += 1
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free_pages:
+                break
+            free_pages = remaining
+        return {"freed_pages": initial - free_pages, "free_pages_left": free_pages, "steps": steps}
+
+    def _optimize(self, conn) -> Dict[str, Any]:
+        # optimize запускает ANALYZE только для таблиц, где статистика устарела
+        conn.execute("PRAGMA analysis_limit = 400")
+        conn.execute("PRAGMA optimize")
+        return {}
+
+class LoadTrackingMiddleware:
+    """ASGI-middleware учёта активных запросов для планировщика обслуживания"""
+
+    def __init__(self, app, scheduler: MaintenanceScheduler):
+        self.app = app
+        self.scheduler = scheduler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.scheduler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.scheduler.request_finished()
+
+maintenance_scheduler = MaintenanceScheduler()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List, Literal, Dict, Any, Union, Annotated
 from datetime import datetime
 
 class ItemBase(BaseModel):
@@ -29,11 +29,61 @@ class Item(ItemBase):
     class Config:
         from_attributes = True
 
+class BatchGetRequest(BaseModel):
+    """Модель для получения нескольких элементов по списку ID"""
+    ids: List[int] = Field(..., min_length=1, max_length=1000, description="Список идентификаторов")
+
+class BatchGetResponse(BaseModel):
+    """Модель ответа на множественное получение элементов"""
+    items: List[Item]
+    missing: List[int]
+
+class GetOperation(BaseModel):
+    """Операция пакетного запроса: получение записи"""
+    op: Literal["get"]
+    id: int
+
+class CreateOperation(BaseModel):
+    """Операция пакетного запроса: создание записи"""
+    op: Literal["create"]
+    data: ItemCreate
+
+class UpdateOperation(BaseModel):
+    """Операция пакетного запроса: обновление записи"""
+    op: Literal["update"]
+    id: int
+    data: ItemUpdate
+
+class DeleteOperation(BaseModel):
+    """Операция пакетного запроса: удаление записи"""
+    op: Literal["delete"]
+    id: int
+
+BatchOperation = Annotated[
+    Union[GetOperation, CreateOperation, UpdateOperation, DeleteOperation],
+    Field(discriminator="op")
+]
+
+class BatchRequest(BaseModel):
+    """Модель пакетного запроса"""
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=1000)
+
+class BatchOperationResult(BaseModel):
+    """Модель результата одной операции пакетного запроса"""
+    op: str
+    id: int
+    item: Optional[Item] = None
+
+class BatchResponse(BaseModel):
+    """Модель ответа на пакетный запрос"""
+    results: List[BatchOperationResult]
+
 class HealthResponse(BaseModel):
     """Модель для ответа проверки здоровья"""
     status: str
     service: str
     timestamp: str
+    maintenance: Optional[Dict[str, Any]] = None
 
 class ErrorResponse(BaseModel):
     """Модель для ошибок"""
@@ -0,0 +1,128 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+# Бинарные форматы подключаются только при наличии библиотек
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+
+# Пары (кодирование, декодирование) для поддерживаемых форматов
+CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {}
+if msgpack is not None:
+    CODECS[MSGPACK_MEDIA_TYPE] = (msgpack.packb, msgpack.unpackb)
+if cbor2 is not None:
+    CODECS[CBOR_MEDIA_TYPE] = (cbor2.dumps, cbor2.loads)
+
+# Синонимы типов, встречающиеся у клиентов
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+}
+
+def _normalize_media_type(value: str) -> str:
+    """Приведение типа содержимого к каноническому виду без параметров"""
+    media_type = value.split(";", 1)[0].strip().lower()
+    return MEDIA_TYPE_ALIASES.get(media_type, media_type)
+
+def select_media_type(accept: Optional[str]) -> str:
+    """Выбор формата ответа по заголовку Accept с учётом q-значений"""
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        quality = 1.0
+        for param in part.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = _normalize_media_type(part)
+        if quality > 0 and (media_type in CODECS or media_type == JSON_MEDIA_TYPE):
+            candidates.append((-quality, position, media_type))
+
+    return min(candidates)[2] if candidates else JSON_MEDIA_TYPE
+
+class MsgPackResponse(Response):
+    """Ответ в формате MessagePack"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content)
+
+class CBORResponse(Response):
+    """Ответ в формате CBOR"""
+    media_type = CBOR_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return cbor2.dumps(content)
+
+# Классы ответов для бинарных форматов; JSON обслуживает стандартный класс FastAPI
+RESPONSE_CLASSES = {
+    media_type: response_class
+    for media_type, response_class in [
+        (MSGPACK_MEDIA_TYPE, MsgPackResponse), (CBOR_MEDIA_TYPE, CBORResponse)
+    ]
+    if media_type in CODECS
+}
+
+class DecodedRequest(Request):
+    """Запрос, тело которого закодировано в MessagePack или CBOR"""
+
+    def __init__(self, request: Request, media_type: str):
+        # FastAPI разбирает тело только для JSON, поэтому подменяем тип содержимого
+        headers = [
+            (key, value) for key, value in request.scope["headers"] if key != b"content-type"
+        ]
+        headers.append((b"content-type", JSON_MEDIA_TYPE.encode()))
+        super().__init__({**request.scope, "headers": headers}, request.receive)
+        self._decode = CODECS[media_type][1]
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_decoded_json"):
+            self._decoded_json = self._decode(await self.body())
+        return self._decoded_json
+
+class NegotiatedRoute(APIRoute):
+    """Маршрут с согласованием формата запроса и ответа (JSON, MessagePack, CBOR)"""
+
+    def get_route_handler(self) -> Callable:
+        # Для JSON остаётся стандартный обработчик с быстрой сериализацией FastAPI,
+        # для бинарных форматов строятся отдельные обработчики со своим классом ответа
+        json_route_handler = super().get_route_handler()
+        route_handlers = {JSON_MEDIA_TYPE: json_route_handler}
+        default_response_class = self.response_class
+        try:
+            for media_type, response_class in RESPONSE_CLASSES.items():
+                self.response_class = response_class
+                route_handlers[media_type] = super().get_route_handler()
+        finally:
+            self.response_class = default_response_class
+
+        async def negotiated_route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type")
+            if content_type:
+                media_type = _normalize_media_type(content_type)
+                if media_type in CODECS:
+                    request = DecodedRequest(request, media_type)
+
+            route_handler = route_handlers[select_media_type(request.headers.get("accept"))]
+            response = await route_handler(request)
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return negotiated_route_handler
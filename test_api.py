@@ -3,6 +3,17 @@ import requests
 import json
 from fastapi.testclient import TestClient
 from main import app
+from maintenance import MaintenanceScheduler, maintenance_scheduler, IDLE_SECONDS
+from models import ItemCreate
+import database
+import sqlite3
+import functools
+import subprocess
+import sys
+import os
+from logging_config import setup_logging
+import io
+import logging
 
 client = TestClient(app)
 
@@ -22,6 +33,7 @@ def test_health_check():
     data = response.json()
     assert data["status"] == "healthy"
     assert data["service"] == "integration-api"
+    assert "tasks" in data["maintenance"]
 
 def test_create_item():
     """Тест создания элемента"""
@@ -165,6 +177,300 @@ def test_empty_items_list():
     assert isinstance(data, list)
     assert len(data) == 0
 
+def test_batch_get_items():
+    """Тест получения нескольких элементов по списку ID"""
+    ids = []
+    for name in ["Первый", "Второй"]:
+        create_response = client.post("/items", json={"name": name})
+        assert create_response.status_code == 201
+        ids.append(create_response.json()["id"])
+    
+    response = client.post("/items/batch-get", json={"ids": [ids[1], 999999, ids[0], ids[1]]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [ids[1], ids[0]]
+    assert data["missing"] == [999999]
+    
+    # Пустой список ID
+    response = client.post("/items/batch-get", json={"ids": []})
+    assert response.status_code == 422
+    
+    # Очистка
+    for item_id in ids:
+        delete_response = client.delete(f"/items/{item_id}")
+        assert delete_response.status_code == 200
+
+def test_batch_operations():
+    """Тест пакетного выполнения операций"""
+    create_response = client.post("/items", json={"name": "Пакетный элемент", "price": 10.0})
+    assert create_response.status_code == 201
+    item_id = create_response.json()["id"]
+    
+    operations = [
+        {"op": "create", "data": {"name": "Новый из пакета", "quantity": 3}},
+        {"op": "update", "id": item_id, "data": {"price": 20.0}},
+        {"op": "get", "id": item_id},
+        {"op": "delete", "id": item_id}
+    ]
+    response = client.post("/batch", json={"operations": operations})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["op"] for result in results] == ["create", "update", "get", "delete"]
+    assert results[0]["item"]["name"] == "Новый из пакета"
+    assert results[1]["item"]["price"] == 20.0
+    assert results[3]["item"] is None
+    
+    response = client.get(f"/items/{item_id}")
+    assert response.status_code == 404
+    
+    # Очистка
+    delete_response = client.delete(f"/items/{results[0]['id']}")
+    assert delete_response.status_code == 200
+
+def test_batch_runs_in_single_transaction(tmp_path, monkeypatch):
+    """Тест: пакет из одних чтений тоже выполняется в транзакции"""
+    monkeypatch.setattr(database, "DATABASE_NAME", str(tmp_path / "batch.db"))
+    database.init_db()
+    item_id = database.create_item(ItemCreate(name="Транзакция"))["id"]
+    
+    # Пока другое соединение держит блокировку записи, пакет не может начать транзакцию
+    conn = sqlite3.connect(database.DATABASE_NAME, timeout=0)
+    conn.execute("BEGIN IMMEDIATE")
+    monkeypatch.setattr(sqlite3, "connect", functools.partial(sqlite3.connect, timeout=0))
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            database.execute_batch([("get", item_id, None)])
+    finally:
+        conn.rollback()
+        conn.close()
+
+def test_batch_rollback():
+    """Тест отката пакета при ошибке в одной из операций"""
+    create_response = client.post("/items", json={"name": "Не должен измениться"})
+    assert create_response.status_code == 201
+    item_id = create_response.json()["id"]
+    
+    operations = [
+        {"op": "update", "id": item_id, "data": {"name": "Изменён"}},
+        {"op": "delete", "id": 999999}
+    ]
+    response = client.post("/batch", json={"operations": operations})
+    assert response.status_code == 409
+    assert response.json()["detail"] == {
+        "operation": 1,
+        "id": 999999,
+        "msg": "Запись с ID 999999 не найдена"
+    }
+    
+    response = client.get(f"/items/{item_id}")
+    assert response.json()["name"] == "Не должен измениться"
+    
+    # Некорректные данные операции
+    operations = [{"op": "get", "id": item_id}, {"op": "create", "data": {"name": ""}}, {"op": "delete"}]
+    response = client.post("/batch", json={"operations": operations})
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert [error["loc"] for error in detail] == [
+        ["body", "operations", 1, "create", "data", "name"],
+        ["body", "operations", 2, "delete", "id"]
+    ]
+    assert detail[0]["type"] == "string_too_short"
+    
+    # Очистка
+    delete_response = client.delete(f"/items/{item_id}")
+    assert delete_response.status_code == 200
+
+def test_msgpack_negotiation():
+    """Тест приёма и отправки данных в формате MessagePack"""
+    msgpack = pytest.importorskip("msgpack")
+    headers = {"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    
+    item_data = {"name": "Элемент в MessagePack", "description": "Описание", "price": 12.5}
+    response = client.post("/items", content=msgpack.packb(item_data), headers=headers)
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content)
+    assert data["name"] == item_data["name"]
+    item_id = data["id"]
+    
+    response = client.put(f"/items/{item_id}", content=msgpack.packb({"quantity": 7}), headers=headers)
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content)["quantity"] == 7
+    
+    response = client.get("/items", headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert item_id in [item["id"] for item in msgpack.unpackb(response.content)]
+    
+    # Валидация работает так же, как для JSON
+    response = client.post("/items", content=msgpack.packb({"name": ""}), headers=headers)
+    assert response.status_code == 422
+    
+    # Без заголовка Accept ответ остаётся в JSON
+    response = client.get(f"/items/{item_id}")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["id"] == item_id
+    
+    # Очистка
+    delete_response = client.delete(f"/items/{item_id}")
+    assert delete_response.status_code == 200
+
+def test_cbor_negotiation():
+    """Тест приёма и отправки данных в формате CBOR"""
+    cbor2 = pytest.importorskip("cbor2")
+    headers = {"Content-Type": "application/cbor", "Accept": "application/cbor"}
+    
+    response = client.post("/items", content=cbor2.dumps({"name": "Элемент в CBOR"}), headers=headers)
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/cbor"
+    item_id = cbor2.loads(response.content)["id"]
+    
+    response = client.get(f"/items/{item_id}", headers={"Accept": "application/json;q=0.5, application/cbor"})
+    assert response.headers["content-type"] == "application/cbor"
+    assert cbor2.loads(response.content)["name"] == "Элемент в CBOR"
+    
+    # Очистка
+    delete_response = client.delete(f"/items/{item_id}")
+    assert delete_response.status_code == 200
+
+def test_maintenance_tasks(tmp_path, monkeypatch):
+    """Тест выполнения задач обслуживания базы данных"""
+    monkeypatch.setattr(database, "DATABASE_NAME", str(tmp_path / "maintenance.db"))
+    database.init_db()
+    scheduler = MaintenanceScheduler()
+    
+    # Создаём и удаляем записи, чтобы появились свободные страницы
+    ids = [
+        database.create_item(ItemCreate(name=f"Временный {i}", description="Ж" * 400))["id"]
+        for i in range(50)
+    ]
+    for item_id in ids:
+        assert database.delete_item(item_id)
+    
+    for name in ["checkpoint", "vacuum", "optimize"]:
+        stats = scheduler.run_task(name)
+        assert stats["status"] == "ok", stats
+        assert stats["runs"] == 1
+    assert scheduler.stats["vacuum"]["freed_pages"] > 0
+    assert scheduler.stats["vacuum"]["free_pages_left"] == 0
+    assert set(scheduler.get_stats()["tasks"]) == {"checkpoint", "vacuum", "optimize"}
+
+def test_maintenance_vacuum_requires_incremental_mode(tmp_path, monkeypatch):
+    """Тест отказа incremental_vacuum для базы без auto_vacuum = INCREMENTAL"""
+    db_path = tmp_path / "legacy.db"
+    monkeypatch.setattr(database, "DATABASE_NAME", str(db_path))
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [("Ж" * 400,)] * 200)
+    conn.execute("DELETE FROM items")
+    conn.commit()
+    conn.close()
+    
+    stats = MaintenanceScheduler().run_task("vacuum")
+    assert stats["status"] == "error"
+    assert "auto_vacuum" in stats["error"]
+
+def test_init_db_skips_migration_when_locked(tmp_path, monkeypatch):
+    """Тест запуска init_db, когда базу держит другое соединение"""
+    db_path = tmp_path / "locked.db"
+    monkeypatch.setattr(database, "DATABASE_NAME", str(db_path))
+    monkeypatch.setattr(database, "INIT_BUSY_TIMEOUT_MS", 0)
+    
+    # База в прежнем формате: без auto_vacuum и с открытой транзакцией чтения
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE items (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+    legacy.execute(
+        "CREATE TRIGGER update_items_timestamp AFTER UPDATE ON items "
+        "BEGIN SELECT 1; END"
+    )
+    legacy.commit()
+    reader = sqlite3.connect(db_path)
+    reader.execute("BEGIN")
+    reader.execute("SELECT * FROM items").fetchall()
+    try:
+        database.init_db()
+    finally:
+        reader.rollback()
+        reader.close()
+    
+    assert legacy.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    legacy.close()
+    
+    # Планировщик сообщает о недоступном incremental_vacuum
+    stats = MaintenanceScheduler().run_task("vacuum")
+    assert stats["status"] == "error"
+
+def test_maintenance_load_tracking():
+    """Тест учёта запросов: сразу после запроса обслуживание не запускается"""
+    maintenance_scheduler.idle_seconds = 60
+    try:
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert not maintenance_scheduler.is_idle()
+    finally:
+        maintenance_scheduler.idle_seconds = IDLE_SECONDS
+
+def test_maintenance_settings_from_environment():
+    """Тест настройки расписания обслуживания через переменные окружения"""
+    env = dict(
+        os.environ,
+        DB_MAINTENANCE_VACUUM_INTERVAL="90",
+        DB_MAINTENANCE_IDLE_SECONDS="bad",
+        DB_MAINTENANCE_CHECKPOINT_INTERVAL="-5",
+        DB_MAINTENANCE_VACUUM_STEP_PAGES="0"
+    )
+    script = (
+        "import maintenance; from maintenance import maintenance_scheduler as s;"
+        "print(s.intervals['vacuum'], s.idle_seconds, s.intervals['checkpoint'],"
+        " maintenance.VACUUM_STEP_PAGES)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+    ).stdout.split()
+    assert output == ["90.0", "2.0", "300.0", "256"]
+
+def test_structured_logging():
+    """Тест JSON-журнала с идентификатором запроса и прореживанием"""
+    stream = io.StringIO()
+    setup_logging(stream=stream, sample_rates={logging.INFO: 1.0}, force=True)
+    try:
+        headers = {"X-Request-ID": "test-request-42"}
+        create_response = client.post("/items", json={"name": "Журналируемый"}, headers=headers)
+        assert create_response.status_code == 201
+        assert create_response.headers["X-Request-ID"] == "test-request-42"
+        item_id = create_response.json()["id"]
+        
+        # Без заголовка идентификатор создаётся сервером
+        response = client.get(f"/items/{item_id}")
+        assert response.headers["X-Request-ID"]
+        
+        # Успешные операции не попадают в журнал при нулевой доле
+        setup_logging(stream=stream, sample_rates={logging.INFO: 0.0}, force=True)
+        delete_response = client.delete(f"/items/{item_id}")
+        assert delete_response.status_code == 200
+    finally:
+        setup_logging(force=True)
+    
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    created = [r for r in records if r["message"] == f"Создана новая запись с ID: {item_id}"]
+    assert len(created) == 1
+    assert created[0]["request_id"] == "test-request-42"
+    assert created[0]["level"] == "INFO"
+    assert not [r for r in records if r["message"].startswith("Удалена запись")]
+
+def test_logging_keeps_existing_configuration():
+    """Тест: импорт приложения не заменяет уже настроенный журнал"""
+    script = (
+        "import logging, sys; logging.basicConfig(stream=sys.stdout, format='host %(message)s');"
+        "handlers = list(logging.getLogger().handlers);"
+        "import main; print(logging.getLogger().handlers == handlers)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+    ).stdout.split()
+    assert output == ["True"]
+
 if __name__ == "__main__":
     # Запуск тестов
     import sys